@@ -9,106 +9,126 @@ from typing import List
 logger = logging.getLogger(__name__)
 
 
+START_BODY = (
+    "Send me files or URLs to upload to GitHub release!\n\n"
+    "**Features:**\n"
+    "• Send multiple files - they'll upload one by one\n"
+    "• Send multiple URLs - processed in order\n"
+    "• Send YouTube URLs - choose quality and auto-merge\n"
+    "• Send TXT files with filename:url format for batch upload\n"
+    "• Real-time progress with speed display\n"
+    "• Queue system for batch uploads\n"
+    "• Preserves Unicode filenames (Hindi, etc.)\n\n"
+    "**Commands:**\n"
+    "• Send any file (up to 4GB)\n"
+    "• Send a URL to download and upload\n"
+    "• Send YouTube URL for video download\n"
+    "• Send TXT file with filename:url pairs\n"
+    "• /help - Show this message\n"
+    "• /status - Check upload status\n"
+    "• /queue - Check queue status\n"
+)
+
+START_TEXT = (
+    "🤖 **GitHub Release Uploader Bot**\n\n"
+    "👤 **Regular User**\n\n" +
+    START_BODY
+)
+
+ADMIN_START_TEXT = (
+    "🤖 **GitHub Release Uploader Bot**\n\n"
+    "👤 **Admin User**\n\n" +
+    START_BODY +
+    "• /list - List files in release with navigation (Admin only)\n"
+    "• /search <filename> - Search files by name (Admin only)\n"
+    "• /delete <number> - Delete file by list number (Admin only)\n"
+    "• /rename <number> <new_filename> - Rename file (Admin only)\n"
+    "• /stop - Stop all processes (Admin only)\n"
+    "• /restart - Restart all processes (Admin only)"
+)
+
+HELP_TEXT = (
+    "**How to use:**\n\n"
+    "1. **File Upload**: Send any file directly to the bot\n"
+    "2. **URL Upload**: Send a URL pointing to a file\n"
+    "3. **YouTube Download**: Send a YouTube URL, select quality, and bot will merge & upload\n"
+    "4. **Batch Upload**: Send TXT file with filename:url pairs\n"
+    "5. **Queue System**: Send multiple files/URLs - they'll queue automatically\n\n"
+    "**YouTube Support:**\n"
+    "• Send any YouTube video URL\n"
+    "• Bot fetches available qualities (360p, 720p, 1080p, 2K, 4K)\n"
+    "• Select your preferred quality\n"
+    "• Bot automatically merges audio+video using FFmpeg\n"
+    "• Uploads final video to GitHub release\n\n"
+    "**TXT File Format for Batch Upload:**\n"
+    "```\n"
+    "movie1.mp4 : https://example.com/video1.mp4\n"
+    "document.pdf : https://example.com/doc.pdf\n"
+    "song.mp3 : https://example.com/audio.mp3\n"
+    "```\n\n"
+    "**Features:**\n"
+    "• Supports files up to 4GB\n"
+    "• Real-time progress updates with speed\n"
+    "• Queue system for multiple uploads\n"
+    "• Direct upload to GitHub releases\n"
+    "• Preserves Unicode filenames (Hindi, Arabic, etc.)\n"
+    "• Batch upload generates results TXT file\n"
+    "• YouTube video download with quality selection\n\n"
+)
+
+ADMIN_HELP_TEXT = (
+    "\n\n**Admin Commands:**\n"
+    "• /list - Browse files with navigation buttons\n"
+    "• /search <filename> - Search files by name\n"
+    "• /delete <numbers> - Delete files by list numbers (supports multiple files and ranges)\n"
+    "• /rename <number> <new_name> - Rename file by list number\n"
+    "• /stop - Stop all running processes\n"
+    "• /restart - Restart all processes\n\n"
+    "**Examples:**\n"
+    "• /list - Browse files with Previous/Next buttons\n"
+    "• /search video.mp4 - Find files containing 'video.mp4'\n"
+    "• /delete 5 - Delete file number 5 from list\n"
+    "• /delete 1,3,5 - Delete multiple files\n"
+    "• /delete 1-5 - Delete range of files\n"
+    "• /delete 1-3,7,9-12 - Delete mixed files and ranges\n"
+    "• /rename 5 new_video.mp4 - Rename file number 5"
+)
+
+
+def format_asset_entry(number: int, asset: dict) -> str:
+    """Format one release asset as a numbered /list or /search entry"""
+    size_mb = asset['size'] / (1024 * 1024)
+    return (
+        f"**{number}.** `{asset['name']}`\n"
+        f"   📊 Size: {size_mb:.1f} MB\n"
+        f"   🔗 [Download]({asset['browser_download_url']})\n\n"
+    )
+
+
 class CommandHandlers:
     """Handles all bot commands"""
     
     def __init__(self, bot):
         self.bot = bot
+        # /help text only depends on config, so build both variants once
+        release_info = (
+            f"**Target Repository:** `{bot.config.github_repo}`\n"
+            f"**Release Tag:** `{bot.config.github_release_tag}`"
+        )
+        self.help_text = HELP_TEXT + release_info
+        self.admin_help_text = self.help_text + ADMIN_HELP_TEXT
     
     def register_handlers(self, client):
         """Register all command handlers"""
         
         @client.on(events.NewMessage(pattern='/start'))
         async def start_handler(event):
-            user_id = event.sender_id
-            is_admin = self.bot.is_admin(user_id)
-            admin_status = "**Admin User**" if is_admin else "**Regular User**"
-            
-            await event.respond(
-                f"🤖 **GitHub Release Uploader Bot**\n\n"
-                f"👤 {admin_status}\n\n"
-                "Send me files or URLs to upload to GitHub release!\n\n"
-                "**Features:**\n"
-                "• Send multiple files - they'll upload one by one\n"
-                "• Send multiple URLs - processed in order\n"
-                "• Send YouTube URLs - choose quality and auto-merge\n"
-                "• Send TXT files with filename:url format for batch upload\n"
-                "• Real-time progress with speed display\n"
-                "• Queue system for batch uploads\n"
-                "• Preserves Unicode filenames (Hindi, etc.)\n\n"
-                "**Commands:**\n"
-                "• Send any file (up to 4GB)\n"
-                "• Send a URL to download and upload\n"
-                "• Send YouTube URL for video download\n"
-                "• Send TXT file with filename:url pairs\n"
-                "• /help - Show this message\n"
-                "• /status - Check upload status\n"
-                "• /queue - Check queue status\n" +
-                ("• /list - List files in release with navigation (Admin only)\n"
-                "• /search <filename> - Search files by name (Admin only)\n"
-                "• /delete <number> - Delete file by list number (Admin only)\n"
-                "• /rename <number> <new_filename> - Rename file (Admin only)\n"
-                "• /stop - Stop all processes (Admin only)\n"
-                "• /restart - Restart all processes (Admin only)" if is_admin else "")
-            )
+            await event.respond(ADMIN_START_TEXT if self.bot.is_admin(event.sender_id) else START_TEXT)
             raise events.StopPropagation
         
         @client.on(events.NewMessage(pattern='/help'))
         async def help_handler(event):
-            user_id = event.sender_id
-            is_admin = self.bot.is_admin(user_id)
-            
-            basic_help = (
-                "**How to use:**\n\n"
-                "1. **File Upload**: Send any file directly to the bot\n"
-                "2. **URL Upload**: Send a URL pointing to a file\n"
-                "3. **YouTube Download**: Send a YouTube URL, select quality, and bot will merge & upload\n"
-                "4. **Batch Upload**: Send TXT file with filename:url pairs\n"
-                "5. **Queue System**: Send multiple files/URLs - they'll queue automatically\n\n"
-                "**YouTube Support:**\n"
-                "• Send any YouTube video URL\n"
-                "• Bot fetches available qualities (360p, 720p, 1080p, 2K, 4K)\n"
-                "• Select your preferred quality\n"
-                "• Bot automatically merges audio+video using FFmpeg\n"
-                "• Uploads final video to GitHub release\n\n"
-                "**TXT File Format for Batch Upload:**\n"
-                "```\n"
-                "movie1.mp4 : https://example.com/video1.mp4\n"
-                "document.pdf : https://example.com/doc.pdf\n"
-                "song.mp3 : https://example.com/audio.mp3\n"
-                "```\n\n"
-                "**Features:**\n"
-                "• Supports files up to 4GB\n"
-                "• Real-time progress updates with speed\n"
-                "• Queue system for multiple uploads\n"
-                "• Direct upload to GitHub releases\n"
-                "• Preserves Unicode filenames (Hindi, Arabic, etc.)\n"
-                "• Batch upload generates results TXT file\n"
-                "• YouTube video download with quality selection\n\n"
-                f"**Target Repository:** `{self.bot.config.github_repo}`\n"
-                f"**Release Tag:** `{self.bot.config.github_release_tag}`"
-            )
-            
-            admin_help = (
-                "\n\n**Admin Commands:**\n"
-                "• /list - Browse files with navigation buttons\n"
-                "• /search <filename> - Search files by name\n"
-                "• /delete <numbers> - Delete files by list numbers (supports multiple files and ranges)\n"
-                "• /rename <number> <new_name> - Rename file by list number\n"
-                "• /stop - Stop all running processes\n"
-                "• /restart - Restart all processes\n\n"
-                "**Examples:**\n"
-                "• /list - Browse files with Previous/Next buttons\n"
-                "• /search video.mp4 - Find files containing 'video.mp4'\n"
-                "• /delete 5 - Delete file number 5 from list\n"
-                "• /delete 1,3,5 - Delete multiple files\n"
-                "• /delete 1-5 - Delete range of files\n"
-                "• /delete 1-3,7,9-12 - Delete mixed files and ranges\n"
-                "• /rename 5 new_video.mp4 - Rename file number 5"
-            )
-            
-            help_text = basic_help + (admin_help if is_admin else "")
-            await event.respond(help_text)
+            await event.respond(self.admin_help_text if self.bot.is_admin(event.sender_id) else self.help_text)
             raise events.StopPropagation
         
         @client.on(events.NewMessage(pattern='/stop'))
@@ -185,23 +205,6 @@ class CommandHandlers:
                 await event.respond(f"❌ **Error listing files**\n\n{str(e)}")
             raise events.StopPropagation
         
-        @client.on(events.CallbackQuery)
-        async def callback_handler(event):
-            user_id = event.sender_id
-            if not self.bot.is_admin(user_id):
-                await event.answer("Access denied", alert=True)
-                return
-            
-            data = event.data.decode('utf-8')
-            
-            if data.startswith('list_page_'):
-                page = int(data.split('_')[2])
-                await self.send_file_list(event, page, edit=True)
-                await event.answer()
-            elif data == 'close_list':
-                await event.delete()
-                await event.answer()
-        
         @client.on(events.NewMessage(pattern=r'/search (.+)'))
         async def search_handler(event):
             user_id = event.sender_id
@@ -229,21 +232,18 @@ class CommandHandlers:
                     await event.respond(f"🔍 **No files found matching:** `{search_term}`")
                     return
                 
-                response = f"🔍 **Search Results for:** `{search_term}`\n\n"
-                
-                for original_num, asset in matching_assets[:20]:
-                    size_mb = asset['size'] / (1024 * 1024)
-                    response += f"**{original_num}.** `{asset['name']}`\n"
-                    response += f"   📊 Size: {size_mb:.1f} MB\n"
-                    response += f"   🔗 [Download]({asset['browser_download_url']})\n\n"
+                parts = [f"🔍 **Search Results for:** `{search_term}`\n\n"]
+                parts.extend(format_asset_entry(original_num, asset) for original_num, asset in matching_assets[:20])
                 
                 if len(matching_assets) > 20:
-                    response += f"... and {len(matching_assets) - 20} more results\n\n"
+                    parts.append(f"... and {len(matching_assets) - 20} more results\n\n")
                 
-                response += f"📊 **Found:** {len(matching_assets)} files\n"
-                response += f"🗑️ Use `/delete <number>` to delete a file"
+                parts.append(
+                    f"📊 **Found:** {len(matching_assets)} files\n"
+                    f"🗑️ Use `/delete <number>` to delete a file"
+                )
                 
-                await event.respond(response)
+                await event.respond(''.join(parts))
                 
             except Exception as e:
                 await event.respond(f"❌ **Error searching files**\n\n{str(e)}")
@@ -419,17 +419,14 @@ class CommandHandlers:
                 await event.respond(f"📂 **Page {page} not found**\n\nTotal pages: {total_pages}")
             return
         
-        response = f"📂 **Files in Release (Page {page}/{total_pages}):**\n\n"
-        
-        for i, asset in enumerate(page_assets, start=start_idx + 1):
-            size_mb = asset['size'] / (1024 * 1024)
-            response += f"**{i}.** `{asset['name']}`\n"
-            response += f"   📊 Size: {size_mb:.1f} MB\n"
-            response += f"   🔗 [Download]({asset['browser_download_url']})\n\n"
-        
-        response += f"📄 **Total:** {len(assets)} files | **Page:** {page}/{total_pages}\n"
-        response += f"🗑️ Use `/delete <number>` to delete a file\n"
-        response += f"✏️ Use `/rename <number> <new_name>` to rename a file"
+        parts = [f"📂 **Files in Release (Page {page}/{total_pages}):**\n\n"]
+        parts.extend(format_asset_entry(i, asset) for i, asset in enumerate(page_assets, start=start_idx + 1))
+        parts.append(
+            f"📄 **Total:** {len(assets)} files | **Page:** {page}/{total_pages}\n"
+            f"🗑️ Use `/delete <number>` to delete a file\n"
+            f"✏️ Use `/rename <number> <new_name>` to rename a file"
+        )
+        response = ''.join(parts)
         
         buttons = []
         nav_row = []
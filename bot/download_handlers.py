@@ -2,17 +2,97 @@
 Download handlers for Telegram, URL, and YouTube downloads
 """
 import asyncio
+import atexit
 import logging
 import time
 import os
+import shutil
 import tempfile
+import uuid
 import aiohttp
 import yt_dlp
 from pytubefix import YouTube
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from bot.utils import PROGRESS_EDIT_INTERVAL, format_size
 
 logger = logging.getLogger(__name__)
 
+# Read size for URL downloads; large enough that the per-chunk loop overhead is negligible
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB
+
+# Retries for URL downloads answered with HTTP 429, and the longest wait between them
+DOWNLOAD_MAX_RETRIES = 3
+DOWNLOAD_MAX_RETRY_DELAY = 60.0
+
+# Container extensions yt-dlp may produce for a finished download
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.webm', '.flv', '.avi')
+
+# Shared by all YouTube downloads; each download names its files with a unique stem
+_youtube_temp_dir: Optional[str] = None
+
+
+def get_youtube_temp_dir() -> str:
+    """Process-wide scratch directory for YouTube downloads, created on first use"""
+    global _youtube_temp_dir
+    if _youtube_temp_dir is None:
+        _youtube_temp_dir = tempfile.mkdtemp(prefix='yt_downloads_')
+        atexit.register(shutil.rmtree, _youtube_temp_dir, ignore_errors=True)
+    return _youtube_temp_dir
+
+
+def remove_youtube_temp_files(stem: str):
+    """Remove every file a single download left in the YouTube temp directory"""
+    try:
+        with os.scandir(get_youtube_temp_dir()) as entries:
+            for entry in entries:
+                if entry.name.startswith(stem):
+                    try:
+                        os.unlink(entry.path)
+                    except FileNotFoundError:
+                        pass
+    except Exception as e:
+        logger.error(f"Error cleaning up temp files: {e}")
+
+
+def retry_after_seconds(retry_after: Optional[str], attempt: int) -> float:
+    """Seconds to wait before retrying a 429: the server's Retry-After, else exponential backoff"""
+    if retry_after and retry_after.strip().isdigit():
+        return min(float(retry_after), DOWNLOAD_MAX_RETRY_DELAY)
+    return min(2.0 ** (attempt + 1), DOWNLOAD_MAX_RETRY_DELAY)
+
+
+def check_download_size(response: aiohttp.ClientResponse, max_file_size: Optional[int]):
+    """Fail before reading the body when the advertised Content-Length is over the limit"""
+    if max_file_size and response.content_length and response.content_length > max_file_size:
+        raise Exception(
+            f"File too large: {format_size(response.content_length)} "
+            f"(maximum is {format_size(max_file_size)})"
+        )
+
+
+def create_download_session() -> aiohttp.ClientSession:
+    """Create a ClientSession for URL downloads; reuse it to keep connections pooled"""
+    timeout = aiohttp.ClientTimeout(total=None, connect=30)
+    connector = aiohttp.TCPConnector(
+        limit=100,
+        limit_per_host=30,
+        ttl_dns_cache=300,
+        use_dns_cache=True,
+        enable_cleanup_closed=True
+    )
+    
+    return aiohttp.ClientSession(
+        timeout=timeout,
+        connector=connector,
+        headers={
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            # Media is already compressed; identity keeps Content-Length accurate
+            # and skips per-chunk decompression
+            'Accept-Encoding': 'identity'
+        }
+    )
+
 
 async def download_telegram_file_streaming(client, document, temp_file, progress_msg, filename: str, 
                                           format_size_func, upload_queues: dict, should_stop: bool,
@@ -23,9 +103,10 @@ async def download_telegram_file_streaming(client, document, temp_file, progress
     start_time = time.time()
     last_update_time = start_time
     last_downloaded = 0
+    last_progress = 0
     
     async def progress_callback(current, total):
-        nonlocal downloaded, last_update_time, last_downloaded
+        nonlocal downloaded, last_update_time, last_downloaded, last_progress
         
         # Check if we should stop
         if should_stop:
@@ -40,8 +121,8 @@ async def download_telegram_file_streaming(client, document, temp_file, progress
         bytes_diff = current - last_downloaded
         speed = bytes_diff / time_diff if time_diff > 0 else 0
         
-        # Update every 2% progress or every 2 seconds
-        if progress - getattr(progress_callback, 'last_progress', 0) >= 2 or time_diff >= 2:
+        # Update every 2% progress or every 2 seconds, throttled to avoid edit floods
+        if time_diff >= PROGRESS_EDIT_INTERVAL and (progress - last_progress >= 2 or time_diff >= 2):
             remaining = len(upload_queues.get(getattr(progress_msg, 'sender_id', 0), []))
             await progress_msg.edit(
                 f"📥 **Downloading from Telegram...** ({current_item}/{total_items})\n\n"
@@ -52,7 +133,7 @@ async def download_telegram_file_streaming(client, document, temp_file, progress
                 f"📋 Remaining: {remaining} files\n"
                 f"{'█' * int(progress // 5)}{'░' * (20 - int(progress // 5))}"
             )
-            progress_callback.last_progress = progress
+            last_progress = progress
             last_update_time = current_time
             last_downloaded = current
     
@@ -67,24 +148,10 @@ async def download_telegram_file_streaming(client, document, temp_file, progress
 async def download_from_url_streaming(url: str, temp_file, progress_msg, filename: str,
                                      format_size_func, upload_queues: dict, should_stop: bool,
                                      add_session_func, remove_session_func,
-                                     current_item: int = 1, total_items: int = 1) -> int:
+                                     current_item: int = 1, total_items: int = 1,
+                                     max_file_size: Optional[int] = None) -> int:
     """Download file from URL with progress and speed using streaming to temp file"""
-    timeout = aiohttp.ClientTimeout(total=None, connect=30)
-    connector = aiohttp.TCPConnector(
-        limit=100,
-        limit_per_host=30,
-        ttl_dns_cache=300,
-        use_dns_cache=True,
-        enable_cleanup_closed=True
-    )
-    
-    session = aiohttp.ClientSession(
-        timeout=timeout,
-        connector=connector,
-        headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-    )
+    session = create_download_session()
     
     user_id = getattr(progress_msg, 'sender_id', 0)
     add_session_func(user_id, session)
@@ -94,15 +161,16 @@ async def download_from_url_streaming(url: str, temp_file, progress_msg, filenam
             if response.status != 200:
                 raise Exception(f"Failed to download: HTTP {response.status}")
             
+            check_download_size(response, max_file_size)
+            
             total_size = int(response.headers.get('content-length', 0))
             downloaded = 0
             start_time = time.time()
             last_update_time = start_time
             last_downloaded = 0
+            last_progress = 0
             
-            chunk_size = 8 * 1024 * 1024  # 8MB chunks
-            
-            async for chunk in response.content.iter_chunked(chunk_size):
+            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
                 if should_stop:
                     raise Exception("Upload stopped by admin command")
                 
@@ -117,7 +185,7 @@ async def download_from_url_streaming(url: str, temp_file, progress_msg, filenam
                     bytes_diff = downloaded - last_downloaded
                     speed = bytes_diff / time_diff if time_diff > 0 else 0
                     
-                    if progress - getattr(download_from_url_streaming, '_last_progress', 0) >= 2 or time_diff >= 2:
+                    if time_diff >= PROGRESS_EDIT_INTERVAL and (progress - last_progress >= 2 or time_diff >= 2):
                         remaining = len(upload_queues.get(user_id, []))
                         await progress_msg.edit(
                             f"📥 **Downloading from URL...** ({current_item}/{total_items})\n\n"
@@ -128,7 +196,7 @@ async def download_from_url_streaming(url: str, temp_file, progress_msg, filenam
                             f"📋 Remaining: {remaining} files\n"
                             f"{'█' * int(progress // 5)}{'░' * (20 - int(progress // 5))}"
                         )
-                        download_from_url_streaming._last_progress = progress
+                        last_progress = progress
                         last_update_time = current_time
                         last_downloaded = downloaded
             
@@ -140,116 +208,28 @@ async def download_from_url_streaming(url: str, temp_file, progress_msg, filenam
             await session.close()
 
 
-async def download_from_url_streaming_with_progress(url: str, temp_file, progress_msg, filename: str,
-                                                    format_size_func, should_stop: bool,
-                                                    current_item: int, total_items: int) -> int:
-    """Download file from URL with individual progress tracking for batch uploads"""
-    timeout = aiohttp.ClientTimeout(total=None, connect=30)
-    connector = aiohttp.TCPConnector(
-        limit=100,
-        limit_per_host=30,
-        ttl_dns_cache=300,
-        use_dns_cache=True,
-        enable_cleanup_closed=True
-    )
-    
-    session = aiohttp.ClientSession(
-        timeout=timeout,
-        connector=connector,
-        headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-    )
-    
-    try:
+@asynccontextmanager
+async def open_download(session: aiohttp.ClientSession, url: str) -> AsyncIterator[aiohttp.ClientResponse]:
+    """GET a URL, backing off on HTTP 429; yields the first response that isn't rate limited"""
+    for attempt in range(DOWNLOAD_MAX_RETRIES + 1):
         async with session.get(url) as response:
-            if response.status != 200:
-                raise Exception(f"Failed to download: HTTP {response.status}")
-            
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            start_time = time.time()
-            last_update_time = start_time
-            last_downloaded = 0
-            
-            chunk_size = 8 * 1024 * 1024  # 8MB chunks
-            
-            async for chunk in response.content.iter_chunked(chunk_size):
-                if should_stop:
-                    raise Exception("Upload stopped by admin command")
-                
-                temp_file.write(chunk)
-                downloaded += len(chunk)
-                current_time = time.time()
-                
-                if total_size > 0:
-                    progress = (downloaded / total_size) * 100
-                    
-                    time_diff = current_time - last_update_time
-                    bytes_diff = downloaded - last_downloaded
-                    speed = bytes_diff / time_diff if time_diff > 0 else 0
-                    
-                    if progress - getattr(download_from_url_streaming_with_progress, f'_last_batch_dl_progress_{current_item}', 0) >= 2 or time_diff >= 2:
-                        remaining = total_items - current_item
-                        await progress_msg.edit(
-                            f"📥 **Downloading...** ({current_item}/{total_items})\n\n"
-                            f"📁 **Current:** `{filename}`\n"
-                            f"📊 **Size:** {format_size_func(downloaded)} / {format_size_func(total_size)}\n"
-                            f"⏳ **Progress:** {progress:.1f}%\n"
-                            f"🚀 **Speed:** {format_size_func(speed)}/s\n"
-                            f"📋 **Remaining:** {remaining} files\n"
-                            f"{'█' * int(progress // 5)}{'░' * (20 - int(progress // 5))}"
-                        )
-                        setattr(download_from_url_streaming_with_progress, f'_last_batch_dl_progress_{current_item}', progress)
-                        last_update_time = current_time
-                        last_downloaded = downloaded
+            # Batch items share a host, so back off when it rate limits us
+            if response.status == 429 and attempt < DOWNLOAD_MAX_RETRIES:
+                delay = retry_after_seconds(response.headers.get('Retry-After'), attempt)
+                logger.warning(f"Rate limited by server, retrying in {delay:.0f}s: {url}")
+                await asyncio.sleep(delay)
+                continue
             
-            temp_file.flush()
-            return downloaded
-    finally:
-        if not session.closed:
-            await session.close()
+            yield response
+            return
 
 
-async def download_from_url_streaming_silent(url: str, temp_file, should_stop: bool) -> int:
-    """Download file from URL silently (no progress updates)"""
-    timeout = aiohttp.ClientTimeout(total=None, connect=30)
-    connector = aiohttp.TCPConnector(
-        limit=100,
-        limit_per_host=30,
-        ttl_dns_cache=300,
-        use_dns_cache=True,
-        enable_cleanup_closed=True
-    )
-    
-    session = aiohttp.ClientSession(
-        timeout=timeout,
-        connector=connector,
-        headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-    )
-    
-    try:
-        async with session.get(url) as response:
-            if response.status != 200:
-                raise Exception(f"Failed to download: HTTP {response.status}")
-            
-            downloaded = 0
-            chunk_size = 8 * 1024 * 1024  # 8MB chunks
-            
-            async for chunk in response.content.iter_chunked(chunk_size):
-                if should_stop:
-                    raise Exception("Upload stopped by admin command")
-                
-                temp_file.write(chunk)
-                downloaded += len(chunk)
-            
-            temp_file.flush()
-            return downloaded
-    finally:
-        if not session.closed:
-            await session.close()
+async def iter_download_chunks(response: aiohttp.ClientResponse, should_stop: bool) -> AsyncIterator[bytes]:
+    """Yield the response body in DOWNLOAD_CHUNK_SIZE pieces"""
+    async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+        if should_stop:
+            raise Exception("Upload stopped by admin command")
+        yield chunk
 
 
 async def make_video_seekable(input_path: str, progress_msg=None) -> str:
@@ -318,7 +298,8 @@ async def download_youtube_with_ytdlp(youtube_url: str, quality: int, filename:
                                      progress_msg, format_size_func, cookies_file: str = "cookies.txt") -> Optional[str]:
     """Download YouTube video using yt-dlp with cookies for authentication and seekable videos"""
     output_path = None
-    temp_dir = None
+    temp_dir = get_youtube_temp_dir()
+    stem = uuid.uuid4().hex
     
     try:
         await progress_msg.edit(
@@ -338,8 +319,7 @@ async def download_youtube_with_ytdlp(youtube_url: str, quality: int, filename:
             logger.warning(f"Cookies file not found at {cookies_path}, proceeding without cookies")
             cookies_path = None
         
-        temp_dir = tempfile.mkdtemp()
-        output_template = os.path.join(temp_dir, "video.%(ext)s")
+        output_template = os.path.join(temp_dir, f"{stem}.%(ext)s")
         
         # Enhanced yt-dlp options for seekable videos
         ydl_opts = {
@@ -441,7 +421,9 @@ async def download_youtube_with_ytdlp(youtube_url: str, quality: int, filename:
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 # Extract info first
                 await progress_msg.edit("🔍 **Fetching video info...**")
-                info = ydl.extract_info(youtube_url, download=False)
+                # yt-dlp is blocking; run it in a worker thread so the loop (and
+                # update_progress) keeps running
+                info = await asyncio.to_thread(ydl.extract_info, youtube_url, download=False)
                 
                 video_title = info.get('title', 'Unknown Title')
                 duration = info.get('duration', 0)
@@ -450,9 +432,9 @@ async def download_youtube_with_ytdlp(youtube_url: str, quality: int, filename:
                 # Log available formats for debugging
                 formats = info.get('formats', [])
                 h264_formats = [f for f in formats if f.get('vcodec', '').startswith('avc1')]
-                logger.info(f"Available H.264 formats: {len(h264_formats)}")
+                logger.debug(f"Available H.264 formats: {len(h264_formats)}")
                 for fmt in h264_formats[:3]:  # Log first 3 H.264 formats
-                    logger.info(f"H.264 format: {fmt.get('format_note', 'N/A')} - {fmt.get('vcodec', 'N/A')} - {fmt.get('resolution', 'N/A')}")
+                    logger.debug(f"H.264 format: {fmt.get('format_note', 'N/A')} - {fmt.get('vcodec', 'N/A')} - {fmt.get('resolution', 'N/A')}")
                 
                 await progress_msg.edit(
                     f"📥 **Downloading video from YouTube...**\n"
@@ -465,7 +447,7 @@ async def download_youtube_with_ytdlp(youtube_url: str, quality: int, filename:
                 )
                 
                 # Start the download
-                ydl.download([youtube_url])
+                await asyncio.to_thread(ydl.download, [youtube_url])
                 
                 # Wait for progress to finish
                 await asyncio.sleep(1)
@@ -478,7 +460,7 @@ async def download_youtube_with_ytdlp(youtube_url: str, quality: int, filename:
         # Find the downloaded file
         downloaded_files = []
         for file in os.listdir(temp_dir):
-            if any(file.endswith(ext) for ext in ['.mp4', '.mkv', '.webm', '.flv', '.avi']):
+            if file.startswith(stem) and file.endswith(VIDEO_EXTENSIONS):
                 downloaded_files.append(os.path.join(temp_dir, file))
         
         if not downloaded_files:
@@ -509,13 +491,8 @@ async def download_youtube_with_ytdlp(youtube_url: str, quality: int, filename:
         
     except Exception as e:
         logger.error(f"Error downloading YouTube video with yt-dlp: {e}")
-        # Clean up temp directory on error
-        if temp_dir and os.path.exists(temp_dir):
-            import shutil
-            try:
-                shutil.rmtree(temp_dir)
-            except Exception as cleanup_error:
-                logger.error(f"Error cleaning up temp directory: {cleanup_error}")
+        # Clean up this download's partial files on error
+        remove_youtube_temp_files(stem)
         raise e
 
 
@@ -541,7 +518,7 @@ async def download_youtube_with_pytubefix(youtube_url: str, quality: int, filena
                 total_size = stream.filesize
                 bytes_downloaded = total_size - bytes_remaining
                 percentage = (bytes_downloaded / total_size) * 100
-                logger.info(f"Download progress: {percentage:.1f}%")
+                logger.debug(f"Download progress: {percentage:.1f}%")
             except Exception as e:
                 logger.error(f"Error in progress callback: {e}")
         
@@ -561,37 +538,44 @@ async def download_youtube_with_pytubefix(youtube_url: str, quality: int, filena
         if yt is None:
             raise Exception("All YouTube clients failed. YouTube may be blocking requests.")
         
-        logger.info(f"Video title: {yt.title}")
-        logger.info(f"Video length: {yt.length} seconds")
+        # pytubefix fetches lazily and blocks, so every network access runs in a worker thread
+        def load_video_details():
+            return yt.title, yt.length
+        
+        video_title, video_length = await asyncio.to_thread(load_video_details)
+        logger.info(f"Video title: {video_title}")
+        logger.info(f"Video length: {video_length} seconds")
         
         await progress_msg.edit(
             f"📥 **Downloading video from YouTube...**\n"
             f"📁 **File:** `{filename}`\n"
-            f"🎬 **Title:** {yt.title[:50]}...\n"
+            f"🎬 **Title:** {video_title[:50]}...\n"
             f"📊 **Quality:** {quality}p\n"
             f"⏳ Selecting best stream..."
         )
         
-        # Rest of your existing pytubefix code...
-        stream = None
-        
-        # Try to get progressive stream at exact quality
-        stream = yt.streams.filter(progressive=True, file_extension='mp4', res=f'{quality}p').first()
-        
-        # If not available, try adaptive stream (video only) and merge later
-        if not stream:
-            logger.info(f"No progressive stream at {quality}p, trying adaptive...")
-            stream = yt.streams.filter(adaptive=True, file_extension='mp4', res=f'{quality}p').first()
-        
-        # Fallback to highest quality progressive stream
-        if not stream:
-            logger.info(f"No stream at {quality}p, getting highest quality progressive...")
-            stream = yt.streams.filter(progressive=True, file_extension='mp4').order_by('resolution').desc().first()
+        def select_stream():
+            # Try to get progressive stream at exact quality
+            stream = yt.streams.filter(progressive=True, file_extension='mp4', res=f'{quality}p').first()
+            
+            # If not available, try adaptive stream (video only) and merge later
+            if not stream:
+                logger.info(f"No progressive stream at {quality}p, trying adaptive...")
+                stream = yt.streams.filter(adaptive=True, file_extension='mp4', res=f'{quality}p').first()
+            
+            # Fallback to highest quality progressive stream
+            if not stream:
+                logger.info(f"No stream at {quality}p, getting highest quality progressive...")
+                stream = yt.streams.filter(progressive=True, file_extension='mp4').order_by('resolution').desc().first()
+            
+            # Last resort: get any mp4 stream
+            if not stream:
+                logger.info("Getting any available mp4 stream...")
+                stream = yt.streams.filter(file_extension='mp4').first()
+            
+            return stream
         
-        # Last resort: get any mp4 stream
-        if not stream:
-            logger.info("Getting any available mp4 stream...")
-            stream = yt.streams.filter(file_extension='mp4').first()
+        stream = await asyncio.to_thread(select_stream)
         
         if not stream:
             raise Exception("No suitable video stream found")
@@ -601,16 +585,15 @@ async def download_youtube_with_pytubefix(youtube_url: str, quality: int, filena
         await progress_msg.edit(
             f"📥 **Downloading video from YouTube...**\n"
             f"📁 **File:** `{filename}`\n"
-            f"🎬 **Title:** {yt.title[:50]}...\n"
+            f"🎬 **Title:** {video_title[:50]}...\n"
             f"📊 **Quality:** {stream.resolution}\n"
             f"⏳ Downloading..."
         )
         
-        # Create temp directory for download
-        temp_dir = tempfile.mkdtemp()
-        
         # Download the stream
-        output_path = stream.download(output_path=temp_dir, filename='video.mp4')
+        output_path = await asyncio.to_thread(
+            stream.download, output_path=get_youtube_temp_dir(), filename=f"{uuid.uuid4().hex}.mp4"
+        )
         
         logger.info(f"Downloaded to: {output_path}")
         
@@ -627,7 +610,7 @@ async def download_youtube_with_pytubefix(youtube_url: str, quality: int, filena
         await progress_msg.edit(
             f"✅ **Download complete!**\n"
             f"📁 **File:** `{filename}`\n"
-            f"🎬 **Title:** {yt.title[:50]}...\n"
+            f"🎬 **Title:** {video_title[:50]}...\n"
             f"📊 **Size:** {format_size_func(file_size)}\n"
             f"📊 **Quality:** {stream.resolution}\n"
             f"⏳ Optimizing video..."
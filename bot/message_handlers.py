@@ -1,12 +1,11 @@
 """
 Message and file upload handlers
 """
+import asyncio
 import logging
-import os
-import tempfile
 import time
 from telethon.tl.types import DocumentAttributeFilename
-from bot.utils import sanitize_filename_preserve_unicode, parse_txt_file_content
+from bot.utils import sanitize_filename_preserve_unicode, parse_txt_file_content, filename_from_url
 
 logger = logging.getLogger(__name__)
 
@@ -31,8 +30,8 @@ class MessageHandlers:
         file_size = document.size
         logger.info(f"Received file: {filename}, size: {file_size} bytes")
         
-        if file_size > 4 * 1024 * 1024 * 1024:
-            await event.respond("❌ File too large. Maximum size is 4GB.")
+        if file_size > self.bot.config.max_file_size:
+            await event.respond(f"❌ File too large. Maximum size is {self.bot.format_size(self.bot.config.max_file_size)}.")
             return
         
         if filename.lower().endswith('.txt'):
@@ -41,7 +40,7 @@ class MessageHandlers:
         
         sanitized_filename = sanitize_filename_preserve_unicode(filename)
         if sanitized_filename != filename:
-            logger.info(f"Sanitized filename: '{filename}' -> '{sanitized_filename}'")
+            logger.debug(f"Sanitized filename: '{filename}' -> '{sanitized_filename}'")
         
         upload_item = {
             'type': 'file',
@@ -64,19 +63,13 @@ class MessageHandlers:
         progress_msg = await event.respond("📄 **Processing TXT file...**\n⏳ Downloading and parsing...")
         
         try:
-            with tempfile.NamedTemporaryFile(mode='w+b', delete=False) as temp_file:
-                await self.bot.client.download_media(document, file=temp_file)
-                temp_file.flush()
-                
-                with open(temp_file.name, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                try:
-                    os.unlink(temp_file.name)
-                except:
-                    pass
+            # Batch lists are small text files, download them straight to memory
+            content_bytes = await self.bot.client.download_media(document, file=bytes)
+            content = content_bytes.decode('utf-8')
             
-            txt_items = await parse_txt_file_content(
+            # Large lists take a while to parse, keep the event loop free meanwhile
+            txt_items = await asyncio.to_thread(
+                parse_txt_file_content,
                 content,
                 self.bot.detect_file_type_from_url,
                 self.bot.get_file_extension_from_url
@@ -107,26 +100,16 @@ class MessageHandlers:
             logger.error(f"Error processing TXT file: {e}")
             await progress_msg.edit(f"❌ **Error processing TXT file**\n\n{str(e)}")
     
-    async def handle_url_upload(self, event):
+    async def handle_url_upload(self, event, url: str):
         """Handle URL upload by adding to queue"""
         user_id = event.sender_id
-        url = event.message.text.strip()
-        
-        filename = url.split('/')[-1] or f"download_{int(time.time())}"
-        if '?' in filename:
-            filename = filename.split('?')[0]
         
+        filename = filename_from_url(url, f"download_{int(time.time())}")
         file_type = self.bot.detect_file_type_from_url(url)
-        if '.' not in filename:
-            ext = self.bot.get_file_extension_from_url(url)
-            if ext:
-                filename = f"{filename}.{ext}"
-            else:
-                filename = f"{filename}.bin"
         
         sanitized_filename = sanitize_filename_preserve_unicode(filename)
         if sanitized_filename != filename:
-            logger.info(f"Sanitized filename: '{filename}' -> '{sanitized_filename}'")
+            logger.debug(f"Sanitized filename: '{filename}' -> '{sanitized_filename}'")
         
         logger.info(f"Queuing URL: {url}, detected type: {file_type}")
         
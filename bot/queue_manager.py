@@ -1,19 +1,23 @@
 """
 Queue management for handling multiple uploads
 """
+import asyncio
 import logging
 import os
 import tempfile
 import time
 from typing import Dict, List
-from collections import deque
+from collections import defaultdict, deque
 from telethon.tl.types import DocumentAttributeFilename
-from bot.utils import sanitize_filename_preserve_unicode, create_result_txt_file
-from bot.download_handlers import download_from_url_streaming_with_progress, download_telegram_file_streaming, download_from_url_streaming
-from bot.upload_handlers import upload_to_github_streaming, upload_to_github_streaming_with_progress
+from bot.utils import sanitize_filename_preserve_unicode, write_result_txt_file, UploadResult, PROGRESS_EDIT_INTERVAL
+from bot.download_handlers import check_download_size, create_download_session, open_download, iter_download_chunks, download_telegram_file_streaming, download_from_url_streaming
+from bot.upload_handlers import upload_to_github_streaming, upload_to_github_streaming_silent
 
 logger = logging.getLogger(__name__)
 
+# Number of TXT batch items downloaded/uploaded at the same time
+TXT_BATCH_CONCURRENCY = 4
+
 
 class QueueManager:
     """Manages upload queues for different users"""
@@ -77,6 +81,19 @@ class QueueManager:
             if user_id in self.bot.active_uploads:
                 del self.bot.active_uploads[user_id]
     
+    def upload_complete_message(self, user_id: int, filename: str, file_size: int, download_url: str,
+                                current_item: int, total_items: int) -> str:
+        """Final progress message for a single queued upload"""
+        remaining = len(self.upload_queues.get(user_id, []))
+        queue_text = f"\n\n📋 **Queue:** {remaining} files remaining" if remaining > 0 else ""
+        
+        return (
+            f"✅ **Upload Complete!** ({current_item}/{total_items})\n\n"
+            f"📁 **File:** `{filename}`\n"
+            f"📊 **Size:** {self.bot.format_size(file_size)}\n"
+            f"🔗 **Download URL:**\n{download_url}{queue_text}"
+        )
+    
     async def process_file_upload(self, upload_item: dict, current_item: int = 1, total_items: int = 1):
         """Process a single file upload from queue"""
         event = upload_item['event']
@@ -103,22 +120,14 @@ class QueueManager:
                     current_item, total_items
                 )
                 
-                await upload_to_github_streaming(
+                download_url = await upload_to_github_streaming(
                     self.bot.github_uploader, temp_file.name, filename, file_size, progress_msg,
                     self.bot.format_size, self.upload_queues, self.bot.should_stop,
                     current_item, total_items
                 )
                 
-                remaining = len(self.upload_queues.get(user_id, []))
-                queue_text = f"\n\n📋 **Queue:** {remaining} files remaining" if remaining > 0 else ""
-                
-                download_url = f"https://github.com/{self.bot.config.github_repo}/releases/download/{self.bot.config.github_release_tag}/{filename}"
-                
                 await progress_msg.edit(
-                    f"✅ **Upload Complete!** ({current_item}/{total_items})\n\n"
-                    f"📁 **File:** `{filename}`\n"
-                    f"📊 **Size:** {self.bot.format_size(file_size)}\n"
-                    f"🔗 **Download URL:**\n{download_url}{queue_text}"
+                    self.upload_complete_message(user_id, filename, file_size, download_url, current_item, total_items)
                 )
                 
             except Exception as e:
@@ -153,25 +162,17 @@ class QueueManager:
                     url, temp_file, progress_msg, filename,
                     self.bot.format_size, self.upload_queues, self.bot.should_stop,
                     self.bot.add_active_session, self.bot.remove_active_session,
-                    current_item, total_items
+                    current_item, total_items, self.bot.config.max_file_size
                 )
                 
-                await upload_to_github_streaming(
+                download_url = await upload_to_github_streaming(
                     self.bot.github_uploader, temp_file.name, filename, file_size, progress_msg,
                     self.bot.format_size, self.upload_queues, self.bot.should_stop,
                     current_item, total_items
                 )
                 
-                remaining = len(self.upload_queues.get(user_id, []))
-                queue_text = f"\n\n📋 **Queue:** {remaining} files remaining" if remaining > 0 else ""
-                
-                download_url = f"https://github.com/{self.bot.config.github_repo}/releases/download/{self.bot.config.github_release_tag}/{filename}"
-                
                 await progress_msg.edit(
-                    f"✅ **Upload Complete!** ({current_item}/{total_items})\n\n"
-                    f"📁 **File:** `{filename}`\n"
-                    f"📊 **Size:** {self.bot.format_size(file_size)}\n"
-                    f"🔗 **Download URL:**\n{download_url}{queue_text}"
+                    self.upload_complete_message(user_id, filename, file_size, download_url, current_item, total_items)
                 )
                 
             except Exception as e:
@@ -183,6 +184,25 @@ class QueueManager:
                 except:
                     pass
     
+    async def upload_response_via_temp_file(self, response, filename: str) -> str:
+        """Download a response of unknown length to a temp file, then upload it"""
+        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+            try:
+                file_size = 0
+                async for chunk in iter_download_chunks(response, self.bot.should_stop):
+                    temp_file.write(chunk)
+                    file_size += len(chunk)
+                temp_file.flush()
+                
+                return await upload_to_github_streaming_silent(
+                    self.bot.github_uploader, temp_file.name, filename, file_size
+                )
+            finally:
+                try:
+                    os.unlink(temp_file.name)
+                except:
+                    pass
+    
     async def process_txt_batch_upload(self, upload_item: dict):
         """Process batch upload from txt file"""
         event = upload_item['event']
@@ -191,7 +211,6 @@ class QueueManager:
         user_id = upload_item['user_id']
         
         total_items = len(txt_items)
-        results = []
         
         status_msg = await event.respond(
             f"📋 **Batch Upload Started**\n\n"
@@ -200,71 +219,128 @@ class QueueManager:
             f"⏳ **Status:** Starting..."
         )
         
-        for i, item in enumerate(txt_items, 1):
-            if self.bot.should_stop:
-                break
+        # Lines that sanitize to the same asset name run one after another, in
+        # file order, so the later one replaces the earlier like a sequential run
+        name_locks = defaultdict(asyncio.Lock)
+        completed = 0
+        successful = 0
+        last_update_time = time.time()
+        
+        # Piping deletes an existing asset before any of the new body has been
+        # downloaded, so only names not yet on the release are piped; items
+        # that replace an asset are spooled to disk first
+        try:
+            existing_names = {asset['name'] for asset in await self.bot.github_uploader.list_release_assets()}
+        except Exception as e:
+            logger.warning(f"Could not list release assets, spooling every batch item to disk: {e}")
+            existing_names = None
+        
+        async def process_item(i: int, item: dict):
+            nonlocal completed, successful, last_update_time
             
-            try:
-                with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                    try:
-                        file_size = await download_from_url_streaming_with_progress(
-                            item['url'], temp_file, status_msg, item['filename'],
-                            self.bot.format_size, self.bot.should_stop, i, total_items
-                        )
+            sanitized_filename = sanitize_filename_preserve_unicode(item['filename'])
+            
+            async with name_locks[sanitized_filename]:
+                if self.bot.should_stop:
+                    return None
+                
+                try:
+                    async with open_download(session, item['url']) as response:
+                        if response.status != 200:
+                            raise Exception(f"Failed to download: HTTP {response.status}")
                         
-                        sanitized_filename = sanitize_filename_preserve_unicode(item['filename'])
+                        check_download_size(response, self.bot.config.max_file_size)
                         
-                        download_url = await upload_to_github_streaming_with_progress(
-                            self.bot.github_uploader, temp_file.name, sanitized_filename, file_size,
-                            status_msg, self.bot.format_size, self.bot.should_stop, i, total_items
+                        # aiohttp decodes compressed bodies, so Content-Length only
+                        # matches the bytes we stream when the body isn't encoded
+                        can_pipe = (
+                            existing_names is not None
+                            and sanitized_filename not in existing_names
+                            and response.content_length
+                            and response.headers.get('Content-Encoding', 'identity') == 'identity'
                         )
-                        
-                        results.append({
-                            'filename': sanitized_filename,
-                            'original_filename': item['filename'],
-                            'github_url': download_url,
-                            'success': True,
-                            'error': None
-                        })
-                        
-                        logger.info(f"Successfully uploaded {sanitized_filename} ({i}/{total_items})")
-                        
-                    except Exception as e:
-                        logger.error(f"Error uploading {item['filename']}: {e}")
-                        results.append({
-                            'filename': item['filename'],
-                            'original_filename': item['filename'],
-                            'github_url': None,
-                            'success': False,
-                            'error': str(e)
-                        })
-                    finally:
-                        try:
-                            os.unlink(temp_file.name)
-                        except:
-                            pass
+                        if can_pipe:
+                            # Known size: pipe the body straight into the GitHub upload
+                            file_size = response.content_length
+                            download_url = await self.bot.github_uploader.upload_asset_stream(
+                                iter_download_chunks(response, self.bot.should_stop),
+                                sanitized_filename, file_size
+                            )
+                        else:
+                            # GitHub needs the size up front, so spool unknown-length or
+                            # encoded bodies to disk to count the real bytes; replacements
+                            # are spooled too so the old asset survives a failed download
+                            download_url = await self.upload_response_via_temp_file(
+                                response, sanitized_filename
+                            )
+                    
+                    result = UploadResult(
+                        filename=sanitized_filename,
+                        original_filename=item['filename'],
+                        github_url=download_url,
+                        success=True,
+                        error=None
+                    )
+                    successful += 1
+                    
+                    logger.info(f"Successfully uploaded {sanitized_filename} ({i}/{total_items})")
+                    
+                except Exception as e:
+                    logger.error(f"Error uploading {item['filename']}: {e}")
+                    result = UploadResult(
+                        filename=item['filename'],
+                        original_filename=item['filename'],
+                        github_url=None,
+                        success=False,
+                        error=str(e)
+                    )
+                
+                # A later line with this name replaces whatever this one left on the release
+                if existing_names is not None:
+                    existing_names.add(sanitized_filename)
             
-            except Exception as e:
-                logger.error(f"Error processing item {i}: {e}")
-                results.append({
-                    'filename': item['filename'],
-                    'original_filename': item['filename'],
-                    'github_url': None,
-                    'success': False,
-                    'error': str(e)
-                })
+            completed += 1
+            current_time = time.time()
+            if completed < total_items and current_time - last_update_time >= PROGRESS_EDIT_INTERVAL:
+                last_update_time = current_time
+                try:
+                    await status_msg.edit(
+                        f"📋 **Batch Upload In Progress**\n\n"
+                        f"📁 **Source:** `{original_filename}`\n"
+                        f"📊 **Completed:** {completed}/{total_items}\n"
+                        f"✅ **Successful:** {successful}\n"
+                        f"❌ **Failed:** {completed - successful}"
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not update batch status: {e}")
+            
+            return result
+        
+        # A fixed pool of workers takes items from one shared iterator, so long
+        # lists don't create a task per line; results are stored by index to
+        # keep the order of the TXT file
+        item_results = [None] * total_items
+        pending_items = enumerate(txt_items)
+        
+        async def worker():
+            for index, item in pending_items:
+                item_results[index] = await process_item(index + 1, item)
+        
+        async with create_download_session() as session:
+            await asyncio.gather(*(worker() for _ in range(min(TXT_BATCH_CONCURRENCY, total_items))))
+        results = [r for r in item_results if r is not None]
         
         # Create and send result file
         try:
-            result_content = await create_result_txt_file(results, original_filename)
             result_filename = f"results_{original_filename.replace('.txt', '')}_{int(time.time())}.txt"
             
-            with tempfile.NamedTemporaryFile(mode='w+', suffix='.txt', delete=False, encoding='utf-8') as result_file:
-                result_file.write(result_content)
+            with tempfile.NamedTemporaryFile(mode='w+', suffix='.txt', delete=False, encoding='utf-8',
+                                             buffering=1024 * 1024) as result_file:
+                write_result_txt_file(result_file, results, original_filename)
                 result_file.flush()
                 
                 try:
-                    successful = sum(1 for r in results if r['success'])
+                    successful = sum(1 for r in results if r.success)
                     failed = total_items - successful
                     
                     await event.client.send_file(
@@ -299,7 +375,7 @@ class QueueManager:
         
         except Exception as e:
             logger.error(f"Error creating result file: {e}")
-            successful = sum(1 for r in results if r['success'])
+            successful = sum(1 for r in results if r.success)
             failed = total_items - successful
             
             await status_msg.edit(
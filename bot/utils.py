@@ -1,13 +1,45 @@
 """
 Utility functions for the Telegram bot
 """
+import asyncio
 import re
 import logging
-from typing import List, Dict
+from typing import Dict, Iterable, List, NamedTuple, Optional
 from datetime import datetime
+from urllib.parse import urlsplit
 
 logger = logging.getLogger(__name__)
 
+# Minimum seconds between Telegram progress message edits
+PROGRESS_EDIT_INTERVAL = 1.0
+
+# Schemes accepted for URL uploads and TXT batch entries
+_URL_SCHEMES = ('http://', 'https://')
+
+# youtube.com/watch (incl. m.youtube.com), youtube.com/shorts, youtube.com/live, youtu.be/
+_YOUTUBE_RE = re.compile(r'youtube\.com/(?:watch|shorts|live)|youtu\.be/', re.IGNORECASE)
+
+# Characters replaced with '_' in filenames: path/shell/URL-problematic
+# punctuation plus ASCII control characters and DEL
+_DANGEROUS_CHARS_TABLE = str.maketrans(
+    dict.fromkeys('<>:"|?#%,()!@;*\\/' + ''.join(map(chr, range(0x20))) + '\x7f', '_')
+)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Plausible file extension: 1-6 lowercase letters/digits
+_EXTENSION_RE = re.compile(r'[a-z0-9]{1,6}')
+
+
+def install_uvloop() -> bool:
+    """Use uvloop's event loop policy when it's installed (Linux/macOS only)"""
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
 
 def sanitize_filename_preserve_unicode(filename: str) -> str:
     """Sanitize filename while preserving Unicode characters like Hindi"""
@@ -16,20 +48,16 @@ def sanitize_filename_preserve_unicode(filename: str) -> str:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         return f"file_{timestamp}"
     
-    # Split filename and extension
-    if '.' in filename:
-        name_part = '.'.join(filename.split('.')[:-1])
-        extension = filename.split('.')[-1]
-    else:
-        name_part = filename
-        extension = ''
+    # Split filename and extension on the last dot
+    name_part, dot, extension = filename.rpartition('.')
+    if not dot:
+        name_part, extension = filename, ''
     
     # Only replace truly problematic characters, preserve Unicode
-    # Remove: < > : " | ? * \ / and control characters
-    name_part = re.sub(r'[<>:"|?#%,()!@;*\\/\x00-\x1f\x7f]', '_', name_part)
+    name_part = name_part.translate(_DANGEROUS_CHARS_TABLE)
     
     # Replace multiple spaces with single space
-    name_part = re.sub(r'\s+', ' ', name_part)
+    name_part = _WHITESPACE_RE.sub(' ', name_part)
     
     # Remove leading/trailing spaces and dots
     name_part = name_part.strip(' .')
@@ -51,41 +79,62 @@ def sanitize_filename(filename: str) -> str:
     return sanitize_filename_preserve_unicode(filename)
 
 
+# Extension signatures checked in order by detect_file_type_from_url
+FILE_TYPE_SIGNATURES = (
+    ('video', ('.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm')),
+    ('m3u8', ('.m3u8', '.m3u')),
+    ('audio', ('.mp3', '.wav', '.flac', '.aac', '.ogg')),
+    ('document', ('.pdf', '.doc', '.docx', '.txt', '.rtf')),
+    ('image', ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')),
+    ('archive', ('.zip', '.rar', '.7z', '.tar', '.gz')),
+)
+
+
 def detect_file_type_from_url(url: str) -> str:
     """Detect file type from URL"""
-    url_lower = url.lower()
-    
     # Remove query parameters for extension detection
-    clean_url = url_lower.split('?')[0]
+    clean_url = url.partition('?')[0].lower()
     
-    # Video formats
-    if any(ext in clean_url for ext in ['.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm']):
-        return 'video'
-    elif any(ext in clean_url for ext in ['.m3u8', '.m3u']):
-        return 'm3u8'
-    # Audio formats
-    elif any(ext in clean_url for ext in ['.mp3', '.wav', '.flac', '.aac', '.ogg']):
-        return 'audio'
-    # Document formats
-    elif any(ext in clean_url for ext in ['.pdf', '.doc', '.docx', '.txt', '.rtf']):
-        return 'document'
-    # Image formats
-    elif any(ext in clean_url for ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']):
-        return 'image'
-    # Archive formats
-    elif any(ext in clean_url for ext in ['.zip', '.rar', '.7z', '.tar', '.gz']):
-        return 'archive'
-    else:
+    # URLs without any dot can't carry an extension
+    if '.' not in clean_url:
         return 'unknown'
+    
+    for file_type, extensions in FILE_TYPE_SIGNATURES:
+        for ext in extensions:
+            if ext in clean_url:
+                return file_type
+    return 'unknown'
+
+
+def get_filename_from_url(url: str) -> str:
+    """Extract the last path component of a URL, without query or fragment"""
+    return urlsplit(url).path.rsplit('/', 1)[-1]
+
+
+def filename_from_url(url: str, fallback: str) -> str:
+    """Derive an upload filename from a URL, always ending in an extension
+    
+    Uses ``fallback`` when the URL path has no usable last component and
+    appends the URL's extension (or ``.bin``) when the name has none.
+    """
+    filename = get_filename_from_url(url)
+    if not filename or len(filename) > 255:
+        filename = fallback
+    
+    if '.' not in filename:
+        ext = get_file_extension_from_url(url)
+        filename = f"{filename}.{ext}" if ext else f"{filename}.bin"
+    
+    return filename
 
 
 def get_file_extension_from_url(url: str) -> str:
     """Extract file extension from URL"""
-    clean_url = url.split('?')[0]  # Remove query parameters
-    if '.' in clean_url:
-        extension = clean_url.split('.')[-1].lower()
+    filename = get_filename_from_url(url)
+    if '.' in filename:
+        extension = filename.rsplit('.', 1)[-1].lower()
         # Validate extension (basic check)
-        if len(extension) <= 6 and re.match(r'^[a-z0-9]+$', extension):
+        if _EXTENSION_RE.fullmatch(extension):
             return extension
     return ''
 
@@ -94,21 +143,14 @@ def is_url(text: str) -> bool:
     """Check if text is a valid URL"""
     if not text:
         return False
-    return text.startswith(('http://', 'https://')) and len(text) > 8
+    return text.startswith(_URL_SCHEMES) and len(text) > 8
 
 
 def is_youtube_url(text: str) -> bool:
     """Check if text is a YouTube URL"""
     if not text:
         return False
-    youtube_patterns = [
-        'youtube.com/watch',
-        'youtu.be/',
-        'm.youtube.com/watch',
-        'youtube.com/shorts',
-        'youtube.com/live'
-    ]
-    return any(pattern in text.lower() for pattern in youtube_patterns)
+    return _YOUTUBE_RE.search(text) is not None
 
 
 def format_size(size: int) -> str:
@@ -120,71 +162,51 @@ def format_size(size: int) -> str:
     return f"{size:.1f} TB"
 
 
-async def parse_txt_file_content(content: str, detect_file_type_func, get_extension_func) -> List[Dict]:
+def parse_txt_file_content(content: str, detect_file_type_func, get_extension_func) -> List[Dict]:
     """Parse txt file content and extract filename:url pairs"""
-    lines = content.strip().split('\n')
     parsed_items = []
+    invalid_lines = []
     
-    for line_num, line in enumerate(lines, 1):
+    # splitlines() also handles CRLF files, and without the leading strip()
+    # the reported line numbers match the file
+    for line_num, line in enumerate(content.splitlines(), 1):
         line = line.strip()
         if not line or line.startswith('#'):  # Skip empty lines and comments
             continue
         
-        if ':' in line:
-            # Split on first colon to handle URLs with colons
-            parts = line.split(':', 1)
-            if len(parts) == 2:
-                filename = parts[0].strip()
-                url = parts[1].strip()
-                
-                if url and is_url(url):  # Check if URL is valid
-                    # If filename is empty, generate one with timestamp
-                    if not filename:
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        filename = f"file_{timestamp}"
-                    
-                    # Detect file type from URL
-                    file_type = detect_file_type_func(url)
-                    
-                    # If filename doesn't have extension, try to add one from URL
-                    if '.' not in filename:
-                        ext = get_extension_func(url)
-                        if ext:
-                            filename = f"{filename}.{ext}"
-                    
-                    parsed_items.append({
-                        'filename': sanitize_filename_preserve_unicode(filename),
-                        'url': url,
-                        'file_type': file_type,
-                        'line_number': line_num
-                    })
-                else:
-                    logger.warning(f"Invalid URL on line {line_num}: {url}")
-            else:
-                logger.warning(f"Invalid format on line {line_num}: {line}")
+        # A bare URL also contains ':', so check for it before splitting on the colon
+        if is_url(line):
+            url = line
+            filename = filename_from_url(url, f"file_{line_num}")
+            file_type = detect_file_type_func(url)
+            
+            parsed_items.append({
+                'filename': sanitize_filename_preserve_unicode(filename),
+                'url': url,
+                'file_type': file_type,
+                'line_number': line_num
+            })
         else:
-            # Treat as URL only, generate filename
-            if is_url(line):
-                url = line
-                # Extract filename from URL or generate with timestamp
-                filename = url.split('/')[-1] or f"file_{line_num}"
-                if '?' in filename:
-                    filename = filename.split('?')[0]
+            # Split on first colon to handle URLs with colons
+            filename, separator, url = line.partition(':')
+            url = url.strip()
+            
+            if separator and is_url(url):  # Check if URL is valid
+                filename = filename.strip()
                 
-                # If no proper filename extracted, use timestamp
-                if not filename or filename.strip() == '' or len(filename) > 255:
+                # If filename is empty, generate one with timestamp
+                if not filename:
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                     filename = f"file_{timestamp}"
                 
+                # Detect file type from URL
                 file_type = detect_file_type_func(url)
                 
-                # Add extension if missing
+                # If filename doesn't have extension, try to add one from URL
                 if '.' not in filename:
                     ext = get_extension_func(url)
                     if ext:
                         filename = f"{filename}.{ext}"
-                    else:
-                        filename = f"{filename}.bin"
                 
                 parsed_items.append({
                     'filename': sanitize_filename_preserve_unicode(filename),
@@ -193,24 +215,35 @@ async def parse_txt_file_content(content: str, detect_file_type_func, get_extens
                     'line_number': line_num
                 })
             else:
-                logger.warning(f"Invalid URL on line {line_num}: {line}")
+                invalid_lines.append(line_num)
+                logger.debug(f"Invalid format on line {line_num}: {line}")
+    
+    if invalid_lines:
+        shown = ', '.join(map(str, invalid_lines[:20]))
+        more = f" (+{len(invalid_lines) - 20} more)" if len(invalid_lines) > 20 else ""
+        logger.warning(f"Skipped {len(invalid_lines)} invalid line(s) in TXT file: {shown}{more}")
     
     return parsed_items
 
 
-async def create_result_txt_file(results: List[Dict], original_filename: str) -> str:
-    """Create a txt file with the upload results"""
-    from datetime import datetime
-    
-    content_lines = []
-    content_lines.append(f"# Upload Results - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    content_lines.append(f"# Original file: {original_filename}")
-    content_lines.append("")
-    
-    for result in results:
-        if result['success']:
-            content_lines.append(f"{result['filename']} : {result['github_url']}")
-        else:
-            content_lines.append(f"# FAILED: {result['filename']} - {result['error']}")
-    
-    return '\n'.join(content_lines)
+class UploadResult(NamedTuple):
+    """Outcome of one TXT batch item"""
+    filename: str
+    original_filename: str
+    github_url: Optional[str]
+    success: bool
+    error: Optional[str]
+
+
+def write_result_txt_file(result_file, results: Iterable[UploadResult], original_filename: str):
+    """Write the upload results to an open text file, one line at a time"""
+    result_file.write(
+        f"# Upload Results - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        f"# Original file: {original_filename}\n"
+        "\n"
+    )
+    result_file.writelines(
+        f"{result.filename} : {result.github_url}\n" if result.success
+        else f"# FAILED: {result.filename} - {result.error}\n"
+        for result in results
+    )
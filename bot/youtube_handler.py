@@ -106,14 +106,12 @@ class YouTubeHandler:
                 f"⏳ **Status:** Uploading..."
             )
             
-            await upload_to_github_streaming(
+            download_url = await upload_to_github_streaming(
                 self.bot.github_uploader, merged_file_path, filename, file_size, progress_msg,
                 self.bot.format_size, self.bot.queue_manager.upload_queues, self.bot.should_stop,
                 1, 1
             )
             
-            download_url = f"https://github.com/{self.bot.config.github_repo}/releases/download/{self.bot.config.github_release_tag}/{filename}"
-            
             await progress_msg.edit(
                 f"✅ **YouTube Upload Complete!**\n\n"
                 f"📁 **File:** `{filename}`\n"
@@ -16,6 +16,10 @@ class BotConfig:
     max_file_size: int = 4 * 1024 * 1024 * 1024  # 4GB
     progress_update_interval: int = 5  # Update every 5%
     
+    def __post_init__(self):
+        # Admin checks run on every update, keep a set for O(1) lookups
+        self._admin_set = frozenset(self.admin_user_ids)
+    
     @classmethod
     def from_env(cls) -> 'BotConfig':
         """Create config from environment variables"""
@@ -59,4 +63,4 @@ class BotConfig:
     
     def is_admin(self, user_id: int) -> bool:
         """Check if user ID is in admin list"""
-        return user_id in self.admin_user_ids
+        return user_id in self._admin_set
@@ -1,13 +1,20 @@
 import aiohttp
 import logging
-from typing import Callable, Optional, List, Dict
+from typing import AsyncIterator, Callable, Optional, List, Dict
 import json
 import io
-import os
 import time
 
 logger = logging.getLogger(__name__)
 
+# No overall limit since asset transfers can be long, but give up on a
+# connection that stops sending data
+API_TIMEOUT = aiohttp.ClientTimeout(total=None, connect=30, sock_read=120)
+
+# Asset uploads can spend longer than sock_read writing the body before any
+# response bytes arrive, so they only keep the connect limit
+UPLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, connect=30)
+
 class GitHubUploader:
     def __init__(self, token: str, repo: str, release_tag: str):
         self.token = token
@@ -15,23 +22,75 @@ class GitHubUploader:
         self.release_tag = release_tag
         self.api_url = "https://api.github.com"
         self.upload_url = "https://uploads.github.com"
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._release_cache = {"etag": None, "release": None, "expires": 0.0}
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared session so TCP+TLS connections to GitHub are reused"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=20,
+                limit_per_host=10,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+                enable_cleanup_closed=True
+            )
+            self._session = aiohttp.ClientSession(
+                timeout=API_TIMEOUT,
+                connector=connector
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the shared session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        
+    @staticmethod
+    def _release_cache_ttl(cache_control: str) -> float:
+        """Get how long release info may be served from cache (at least 30s)"""
+        for directive in cache_control.split(','):
+            name, _, value = directive.strip().partition('=')
+            if name == 'max-age' and value.isdigit():
+                return max(30, int(value))
+        return 30
+    
+    def _invalidate_release_cache(self):
+        """Force the next get_release_info call to revalidate with GitHub"""
+        self._release_cache['expires'] = 0.0
+    
+    async def get_release_info(self, force: bool = False) -> dict:
+        """Get release information by tag, cached and revalidated with ETag"""
+        cache = self._release_cache
+        if not force and cache['release'] is not None and time.monotonic() < cache['expires']:
+            return cache['release']
         
-    async def get_release_info(self) -> dict:
-        """Get release information by tag"""
         url = f"{self.api_url}/repos/{self.repo}/releases/tags/{self.release_tag}"
         headers = {
             "Authorization": f"token {self.token}",
             "Accept": "application/vnd.github.v3+json"
         }
+        if cache['etag'] and cache['release'] is not None:
+            headers["If-None-Match"] = cache['etag']
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 404:
-                    raise Exception(f"Release with tag '{self.release_tag}' not found")
-                elif response.status != 200:
-                    raise Exception(f"Failed to get release info: HTTP {response.status}")
-                
-                return await response.json()
+        session = await self._get_session()
+        async with session.get(url, headers=headers) as response:
+            ttl = self._release_cache_ttl(response.headers.get('Cache-Control', ''))
+            
+            if response.status == 304:
+                cache['expires'] = time.monotonic() + ttl
+                return cache['release']
+            elif response.status == 404:
+                raise Exception(f"Release with tag '{self.release_tag}' not found")
+            elif response.status != 200:
+                raise Exception(f"Failed to get release info: HTTP {response.status}")
+            
+            release = await response.json()
+            cache['etag'] = response.headers.get('ETag')
+            cache['release'] = release
+            cache['expires'] = time.monotonic() + ttl
+            return release
 
     async def delete_existing_asset(self, release_id: int, filename: str) -> bool:
         """Delete existing asset if it exists"""
@@ -41,24 +100,27 @@ class GitHubUploader:
             "Accept": "application/vnd.github.v3+json"
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status != 200:
-                    return False
-                
-                assets = await response.json()
-                for asset in assets:
-                    if asset['name'] == filename:
-                        # Delete the asset
-                        delete_url = f"{self.api_url}/repos/{self.repo}/releases/assets/{asset['id']}"
-                        async with session.delete(delete_url, headers=headers) as delete_response:
-                            logger.info(f"Deleted existing asset: {filename}")
-                            return delete_response.status == 204
-                
+        session = await self._get_session()
+        async with session.get(url, headers=headers) as response:
+            if response.status != 200:
                 return False
+            
+            assets = await response.json()
+        
+        for asset in assets:
+            if asset['name'] == filename:
+                # Delete the asset
+                delete_url = f"{self.api_url}/repos/{self.repo}/releases/assets/{asset['id']}"
+                async with session.delete(delete_url, headers=headers) as delete_response:
+                    logger.info(f"Deleted existing asset: {filename}")
+                    self._invalidate_release_cache()
+                    return delete_response.status == 204
+        
+        return False
 
-    async def upload_asset_streaming(self, file_path: str, filename: str, file_size: int, progress_callback: Optional[Callable] = None) -> str:
-        """Upload file as release asset using streaming from file with speed tracking"""
+    async def upload_asset_stream(self, chunks: AsyncIterator[bytes], filename: str, file_size: int,
+                                  progress_callback: Optional[Callable] = None) -> str:
+        """Upload release asset from an async iterator of chunks with a known total size"""
         try:
             # Get release info
             release_info = await self.get_release_info()
@@ -77,59 +139,63 @@ class GitHubUploader:
                 "Content-Length": str(file_size)
             }
             
-            # Create async generator for streaming upload with speed tracking
-            async def file_generator():
-                chunk_size = 1024 * 1024  # 1MB chunks
+            # Wrap the source so progress is reported as chunks hit the socket
+            async def body_generator():
                 uploaded = 0
-                start_time = time.time()
-                last_callback_time = start_time
-                last_callback_bytes = 0
+                last_callback_time = time.time()
                 
-                with open(file_path, 'rb') as f:
-                    while True:
-                        chunk = f.read(chunk_size)
-                        if not chunk:
-                            break
-                        
-                        uploaded += len(chunk)
-                        current_time = time.time()
-                        
-                        # Call progress callback with proper speed calculation
-                        if progress_callback and (current_time - last_callback_time >= 0.5 or uploaded == file_size):
-                            await progress_callback(uploaded)
-                            last_callback_time = current_time
-                            last_callback_bytes = uploaded
-                        
-                        yield chunk
+                async for chunk in chunks:
+                    uploaded += len(chunk)
+                    if uploaded > file_size:
+                        raise Exception(f"Upload source produced more than the expected {file_size} bytes")
+                    current_time = time.time()
+                    
+                    if progress_callback and (current_time - last_callback_time >= 0.5 or uploaded == file_size):
+                        await progress_callback(uploaded)
+                        last_callback_time = current_time
+                    
+                    yield chunk
+                
+                if uploaded != file_size:
+                    raise Exception(f"Upload source ended after {uploaded} of {file_size} bytes")
 
             # Upload with streaming
-            async with aiohttp.ClientSession() as session:
-                async with session.post(upload_url, headers=headers, data=file_generator()) as response:
-                    if response.status not in [200, 201]:
-                        error_text = await response.text()
-                        raise Exception(f"Failed to upload asset: HTTP {response.status} - {error_text}")
-                    
-                    result = await response.json()
-                    download_url = result['browser_download_url']
-                    logger.info(f"Successfully uploaded {filename} to GitHub")
-                    return download_url
+            session = await self._get_session()
+            async with session.post(upload_url, headers=headers, data=body_generator(),
+                                    timeout=UPLOAD_TIMEOUT) as response:
+                if response.status not in [200, 201]:
+                    error_text = await response.text()
+                    raise Exception(f"Failed to upload asset: HTTP {response.status} - {error_text}")
+                
+                result = await response.json()
+                self._invalidate_release_cache()
+                download_url = result['browser_download_url']
+                logger.info(f"Successfully uploaded {filename} to GitHub")
+                return download_url
                     
         except Exception as e:
             logger.error(f"Error uploading to GitHub: {e}")
             raise
 
+    async def upload_asset_streaming(self, file_path: str, filename: str, file_size: int, progress_callback: Optional[Callable] = None) -> str:
+        """Upload file as release asset using streaming from file with speed tracking"""
+        async def file_chunks():
+            chunk_size = 1024 * 1024  # 1MB chunks
+            with open(file_path, 'rb') as f:
+                while chunk := f.read(chunk_size):
+                    yield chunk
+        
+        return await self.upload_asset_stream(file_chunks(), filename, file_size, progress_callback)
+
     # Keep the old method for backward compatibility
     async def upload_asset(self, file_data: bytes, filename: str, progress_callback: Optional[Callable] = None) -> str:
         """Upload file as release asset (legacy method)"""
-        # Use streaming method with temporary file
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_file.write(file_data)
-            temp_file.flush()
-            try:
-                return await self.upload_asset_streaming(temp_file.name, filename, len(file_data), progress_callback)
-            finally:
-                os.unlink(temp_file.name)
+        async def memory_chunks():
+            chunk_size = 1024 * 1024  # 1MB chunks
+            for offset in range(0, len(file_data), chunk_size):
+                yield file_data[offset:offset + chunk_size]
+        
+        return await self.upload_asset_stream(memory_chunks(), filename, len(file_data), progress_callback)
 
     async def list_release_assets(self) -> List[Dict]:
         """List all assets in the release with proper pagination, sorted by upload time (latest first)"""
@@ -137,6 +203,7 @@ class GitHubUploader:
             release_info = await self.get_release_info()
             release_id = release_info['id']
             
+            session = await self._get_session()
             all_assets = []
             page = 1
             per_page = 100  # Maximum allowed by GitHub API
@@ -152,24 +219,23 @@ class GitHubUploader:
                     "per_page": per_page
                 }
                 
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, headers=headers, params=params) as response:
-                        if response.status != 200:
-                            raise Exception(f"Failed to list assets: HTTP {response.status}")
-                        
-                        assets = await response.json()
-                        
-                        # If no assets returned, we've reached the end
-                        if not assets:
-                            break
-                        
-                        all_assets.extend(assets)
-                        
-                        # If we got fewer assets than requested, we've reached the end
-                        if len(assets) < per_page:
-                            break
-                        
-                        page += 1
+                async with session.get(url, headers=headers, params=params) as response:
+                    if response.status != 200:
+                        raise Exception(f"Failed to list assets: HTTP {response.status}")
+                    
+                    assets = await response.json()
+                
+                # If no assets returned, we've reached the end
+                if not assets:
+                    break
+                
+                all_assets.extend(assets)
+                
+                # If we got fewer assets than requested, we've reached the end
+                if len(assets) < per_page:
+                    break
+                
+                page += 1
             
             # Sort by created_at timestamp in descending order (latest first)
             all_assets.sort(key=lambda asset: asset.get('created_at', ''), reverse=True)
@@ -202,14 +268,15 @@ class GitHubUploader:
                 "Accept": "application/vnd.github.v3+json"
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.delete(url, headers=headers) as response:
-                    if response.status == 204:
-                        logger.info(f"Successfully deleted asset: {filename}")
-                        return True
-                    else:
-                        logger.error(f"Failed to delete asset: HTTP {response.status}")
-                        return False
+            session = await self._get_session()
+            async with session.delete(url, headers=headers) as response:
+                if response.status == 204:
+                    logger.info(f"Successfully deleted asset: {filename}")
+                    self._invalidate_release_cache()
+                    return True
+                else:
+                    logger.error(f"Failed to delete asset: HTTP {response.status}")
+                    return False
                         
         except Exception as e:
             logger.error(f"Error deleting asset: {e}")
@@ -237,22 +304,24 @@ class GitHubUploader:
                 "Accept": "application/octet-stream"
             }
             
-            async with aiohttp.ClientSession() as session:
-                # Download the file content
-                async with session.get(download_url) as download_response:
-                    if download_response.status != 200:
-                        raise Exception(f"Failed to download asset: HTTP {download_response.status}")
-                    
-                    file_content = await download_response.read()
-                
-                # Upload with new name
-                await self.upload_asset(file_content, new_filename)
-                
-                # Delete the old asset
-                await self.delete_asset_by_name(old_filename)
+            session = await self._get_session()
+            
+            # Pipe the download straight into the upload under the new name
+            async with session.get(download_url) as download_response:
+                if download_response.status != 200:
+                    raise Exception(f"Failed to download asset: HTTP {download_response.status}")
                 
-                logger.info(f"Successfully renamed asset: '{old_filename}' -> '{new_filename}'")
-                return True
+                await self.upload_asset_stream(
+                    download_response.content.iter_chunked(1024 * 1024),
+                    new_filename,
+                    target_asset['size']
+                )
+            
+            # Delete the old asset
+            await self.delete_asset_by_name(old_filename)
+            
+            logger.info(f"Successfully renamed asset: '{old_filename}' -> '{new_filename}'")
+            return True
                         
         except Exception as e:
             logger.error(f"Error renaming asset: {e}")
@@ -285,16 +354,18 @@ class GitHubUploader:
                 "name": new_filename
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.patch(url, headers=headers, json=data) as response:
-                    if response.status == 200:
-                        logger.info(f"Successfully renamed asset: '{old_filename}' -> '{new_filename}'")
-                        return True
-                    else:
-                        # If PATCH fails, fall back to the old method
-                        error_text = await response.text()
-                        logger.warning(f"Fast rename failed with status {response.status}: {error_text}, falling back to download/upload method")
-                        return await self.rename_asset(old_filename, new_filename)
+            session = await self._get_session()
+            async with session.patch(url, headers=headers, json=data) as response:
+                if response.status == 200:
+                    logger.info(f"Successfully renamed asset: '{old_filename}' -> '{new_filename}'")
+                    self._invalidate_release_cache()
+                    return True
+                
+                error_text = await response.text()
+            
+            # If PATCH fails, fall back to the old method
+            logger.warning(f"Fast rename failed with status {response.status}: {error_text}, falling back to download/upload method")
+            return await self.rename_asset(old_filename, new_filename)
                         
         except Exception as e:
             logger.error(f"Error in fast rename, falling back to old method: {e}")
@@ -2,8 +2,10 @@
 Main Telegram Bot class - Refactored into modular architecture
 """
 import asyncio
+import atexit
 import logging
 import os
+import re
 import uuid
 from telethon import TelegramClient, events
 from dotenv import load_dotenv
@@ -11,7 +13,7 @@ from github_uploader import GitHubUploader
 from config import BotConfig
 from bot.utils import (
     sanitize_filename_preserve_unicode, detect_file_type_from_url,
-    get_file_extension_from_url, is_url, is_youtube_url, format_size
+    get_file_extension_from_url, is_url, is_youtube_url, format_size, install_uvloop
 )
 from bot.queue_manager import QueueManager
 from bot.youtube_handler import YouTubeHandler
@@ -20,17 +22,39 @@ from bot.command_handlers import CommandHandlers
 
 load_dotenv()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 
+def setup_logging():
+    """Setup logging configuration when running this module directly"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('bot.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def remove_session_files():
+    try:
+        with os.scandir('.') as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith('bot_') and name.endswith(('.session', '.session-journal')):
+                    try:
+                        os.unlink(entry.path)
+                        logger.info(f"Cleaned up session file: {name}")
+                    except FileNotFoundError:
+                        # Telethon may remove its own journal on disconnect
+                        pass
+                    except Exception as e:
+                        logger.warning(f"Could not remove session file {name}: {e}")
+    except Exception as e:
+        logger.warning(f"Error during session cleanup: {e}")
+
+
 class TelegramBot:
     def __init__(self):
         self.config = BotConfig.from_env()
@@ -38,11 +62,15 @@ class TelegramBot:
         
         session_name = f'bot_{uuid.uuid4().hex[:8]}'
         self.client = TelegramClient(session_name, self.config.telegram_api_id, self.config.telegram_api_hash)
+        # Fallback in case the process exits without start() reaching its cleanup
+        atexit.register(remove_session_files)
         self.github_uploader = GitHubUploader(self.config.github_token, self.config.github_repo, self.config.github_release_tag)
         
         self.active_uploads = {}
         self.should_stop = False
         self.active_sessions = {}
+        # Set once client.start() has connected and logged in
+        self.running = False
         
         # Initialize modular handlers
         self.queue_manager = QueueManager(self)
@@ -57,6 +85,14 @@ class TelegramBot:
         self.is_url = is_url
         self.is_youtube_url = is_youtube_url
         self.format_size = format_size
+        
+        # Callback data -> handler, parsed once per button press
+        self._cb_patterns = [
+            (re.compile(r'^yt_quality_(\d+)_(\d+)$'), self._on_yt_quality),
+            (re.compile(r'^yt_cancel_(\d+)$'), self._on_yt_cancel),
+            (re.compile(r'^list_page_(\d+)$'), self._on_list_page),
+            (re.compile(r'^close_list$'), self._on_close_list),
+        ]
     
     def is_admin(self, user_id: int) -> bool:
         return self.config.is_admin(user_id)
@@ -86,9 +122,62 @@ class TelegramBot:
         if user_id in self.active_sessions and session in self.active_sessions[user_id]:
             self.active_sessions[user_id].remove(session)
     
+    async def _on_yt_quality(self, event, quality, callback_user_id):
+        user_id = event.sender_id
+        if user_id != int(callback_user_id):
+            await event.answer("This button is not for you", alert=True)
+            return
+        
+        if user_id not in self.youtube_handler.youtube_pending:
+            await event.answer("Session expired, please send the YouTube URL again", alert=True)
+            return
+        
+        youtube_data = self.youtube_handler.youtube_pending[user_id]
+        await event.delete()
+        await event.answer()
+        
+        await self.youtube_handler.process_youtube_upload(
+            youtube_data['event'],
+            youtube_data['url'],
+            int(quality),
+            youtube_data['data']
+        )
+        
+        del self.youtube_handler.youtube_pending[user_id]
+    
+    async def _on_yt_cancel(self, event, callback_user_id):
+        user_id = event.sender_id
+        if user_id != int(callback_user_id):
+            await event.answer("This button is not for you", alert=True)
+            return
+        if user_id in self.youtube_handler.youtube_pending:
+            del self.youtube_handler.youtube_pending[user_id]
+        await event.delete()
+        await event.answer("❌ Cancelled")
+    
+    async def _on_list_page(self, event, page):
+        if not self.is_admin(event.sender_id):
+            await event.answer("Access denied", alert=True)
+            return
+        await self.command_handlers.send_file_list(event, int(page), edit=True)
+        await event.answer()
+    
+    async def _on_close_list(self, event):
+        if not self.is_admin(event.sender_id):
+            await event.answer("Access denied", alert=True)
+            return
+        await event.delete()
+        await event.answer()
+    
+    async def stop(self):
+        """Disconnect the client; start() closes the uploader and removes session files afterwards"""
+        if self.client.is_connected():
+            await self.client.disconnect()
+    
     async def start(self):
         try:
             await self.client.start(bot_token=self.config.telegram_bot_token)
+            self.running = True
             logger.info("Bot started successfully")
         except Exception as e:
             logger.error(f"Failed to start bot: {e}")
@@ -100,58 +189,12 @@ class TelegramBot:
         # Callback handler
         @self.client.on(events.CallbackQuery)
         async def callback_handler(event):
-            user_id = event.sender_id
             data = event.data.decode('utf-8')
-            
-            if data.startswith('yt_quality_'):
-                parts = data.split('_')
-                quality = int(parts[2])
-                callback_user_id = int(parts[3])
-                
-                if user_id != callback_user_id:
-                    await event.answer("This button is not for you", alert=True)
-                    return
-                
-                if user_id not in self.youtube_handler.youtube_pending:
-                    await event.answer("Session expired, please send the YouTube URL again", alert=True)
-                    return
-                
-                youtube_data = self.youtube_handler.youtube_pending[user_id]
-                await event.delete()
-                await event.answer()
-                
-                await self.youtube_handler.process_youtube_upload(
-                    youtube_data['event'],
-                    youtube_data['url'],
-                    quality,
-                    youtube_data['data']
-                )
-                
-                del self.youtube_handler.youtube_pending[user_id]
-                return
-            
-            elif data.startswith('yt_cancel_'):
-                callback_user_id = int(data.split('_')[2])
-                if user_id != callback_user_id:
-                    await event.answer("This button is not for you", alert=True)
+            for pattern, handler in self._cb_patterns:
+                match = pattern.match(data)
+                if match:
+                    await handler(event, *match.groups())
                     return
-                if user_id in self.youtube_handler.youtube_pending:
-                    del self.youtube_handler.youtube_pending[user_id]
-                await event.delete()
-                await event.answer("❌ Cancelled")
-                return
-            
-            if not self.is_admin(user_id):
-                await event.answer("Access denied", alert=True)
-                return
-            
-            if data.startswith('list_page_'):
-                page = int(data.split('_')[2])
-                await self.command_handlers.send_file_list(event, page, edit=True)
-                await event.answer()
-            elif data == 'close_list':
-                await event.delete()
-                await event.answer()
         
         # Main message handler
         @self.client.on(events.NewMessage)
@@ -178,7 +221,7 @@ class TelegramBot:
                         return
                     
                     if self.is_url(text):
-                        await self.message_handlers.handle_url_upload(event)
+                        await self.message_handlers.handle_url_upload(event, text)
                         return
                     
                     if text and not text.startswith('/'):
@@ -203,19 +246,13 @@ class TelegramBot:
         except Exception as e:
             logger.error(f"Bot disconnected with error: {e}")
         finally:
+            # Session files are only removed once the client has let go of them
+            await self.stop()
+            await self.github_uploader.close()
             await self.cleanup_session_files()
     
     async def cleanup_session_files(self):
-        try:
-            for file in os.listdir('.'):
-                if file.startswith('bot_') and (file.endswith('.session') or file.endswith('.session-journal')):
-                    try:
-                        os.remove(file)
-                        logger.info(f"Cleaned up session file: {file}")
-                    except Exception as e:
-                        logger.warning(f"Could not remove session file {file}: {e}")
-        except Exception as e:
-            logger.warning(f"Error during session cleanup: {e}")
+        remove_session_files()
 
 
 async def main():
@@ -224,4 +261,6 @@ async def main():
 
 
 if __name__ == "__main__":
+    setup_logging()
+    install_uvloop()
     asyncio.run(main())
@@ -1,60 +1,113 @@
 
 #!/usr/bin/env python3
 """
-Simple runner script for the Telegram bot and Flask app.
+Simple runner script for the Telegram bot and its health check server.
 """
 import asyncio
+import atexit
 import sys
 import logging
+import queue
 import signal
-import subprocess
-import os
+from logging.handlers import QueueHandler, QueueListener
+from aiohttp import web
 from main import TelegramBot
 from config import BotConfig
-from threading import Thread
+from bot.utils import install_uvloop
 
-def start_flask():
-    """Start the Flask app using gunicorn"""
-    subprocess.run([
-        "gunicorn", 
-        "--bind", "0.0.0.0:5000",
-        "--workers", "1",
-        "--timeout", "120",
-        "app:app"
-    ])
+async def health_check(request):
+    """Health check endpoint"""
+    return web.Response(text='Free Storage Server Working')
+
+async def start_web_server(host: str = "0.0.0.0", port: int = 5000) -> web.AppRunner:
+    """Serve the health check endpoint on the bot's event loop"""
+    app = web.Application()
+    app.router.add_get('/', health_check)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    try:
+        await site.start()
+    except OSError:
+        await runner.cleanup()
+        raise
+    return runner
 
 def setup_logging():
-    """Setup logging configuration"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('bot.log'),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    """Setup logging configuration
+    
+    Records are handed to a queue and written to bot.log/stdout by a
+    listener thread, so the event loop never blocks on log I/O. The
+    listener is stopped at exit, after any atexit hook registered later
+    has had its log records written.
+    """
+    log_queue = queue.SimpleQueue()
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handlers = [
+        logging.FileHandler('bot.log'),
+        logging.StreamHandler(sys.stdout)
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    # The listener's handlers apply the real format; give the queue handler a
+    # bare one so basicConfig doesn't format each record a second time
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
     
     # Reduce noise from aiohttp and other libraries
     logging.getLogger('aiohttp').setLevel(logging.WARNING)
     logging.getLogger('telethon').setLevel(logging.WARNING)
 
-def signal_handler(signum, frame):
-    """Handle shutdown signals gracefully"""
+def install_signal_handlers(bot: TelegramBot):
+    """Stop the bot on SIGTERM/SIGINT
+    
+    Once the client is running, bot.stop() disconnects it so start()'s
+    shutdown path runs. Until then there is nothing for stop() to
+    disconnect, so the still-starting main task is cancelled instead.
+    """
     logger = logging.getLogger(__name__)
-    logger.info("Received shutdown signal, stopping bot...")
-    sys.exit(0)
+    loop = asyncio.get_running_loop()
+    main_task = asyncio.current_task()
+    # The loop only keeps weak references to tasks
+    stop_tasks = set()
+    
+    def request_shutdown():
+        logger.info("Received shutdown signal, stopping bot...")
+        if not bot.running:
+            main_task.cancel()
+            return
+        
+        task = loop.create_task(bot.stop())
+        stop_tasks.add(task)
+        task.add_done_callback(stop_tasks.discard)
+    
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, request_shutdown)
+        except NotImplementedError:
+            # Not supported by the Windows event loop
+            pass
 
 async def main():
     """Main entry point"""
     setup_logging()
     logger = logging.getLogger(__name__)
     
-    # Start Flask app with gunicorn in a separate thread
-    flask_thread = Thread(target=start_flask)
-    flask_thread.daemon = True
-    flask_thread.start()
+    web_runner = None
     
     try:
+        # The health check is optional, so the bot still runs if the port is taken
+        try:
+            web_runner = await start_web_server()
+        except OSError as e:
+            logger.error(f"Could not start health check server: {e}")
+        
         # Load and validate configuration
         config = BotConfig.from_env()
         config.validate()
@@ -65,6 +118,7 @@ async def main():
         
         # Start the bot
         bot = TelegramBot()
+        install_signal_handlers(bot)
         await bot.start()
         
     except ValueError as e:
@@ -72,9 +126,17 @@ async def main():
         sys.exit(1)
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
+    except asyncio.CancelledError:
+        # A shutdown signal arrived while the client was still connecting
+        logger.info("Bot stopped before it finished starting")
+        await bot.stop()
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         sys.exit(1)
+    finally:
+        if web_runner is not None:
+            await web_runner.cleanup()
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())